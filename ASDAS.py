@@ -5,75 +5,279 @@
 
 
 ## Preparation - Import Module ##
+import asyncio
+import json
+import random
+import types
+from concurrent.futures import ThreadPoolExecutor
 import streamlit as st
-import folium
 import pandas as pd
 import numpy as np
 import requests
 from datetime import datetime, timedelta
-import metpy.calc as mpcalc
-from metpy.units import units, pandas_dataframe_to_unit_arrays
-from siphon.simplewebservice.wyoming import WyomingUpperAir
+from pathlib import Path
+from numba import guvectorize, vectorize
+# metpy, folium, siphon, dan pyarrow diimpor di dalam fungsi yang memakainya agar start Streamlit lebih cepat
+
+## Observation Stations ##
+DATE = datetime(2023, 10, 16, 00)
+# konstanta tingkat modul (immutable), tidak dibangun ulang setiap rerun Streamlit
+# comment ini untuk percobaan biar ga lama runningnya kalo error
+STATION_TO_LOC = types.MappingProxyType({
+    'WITT': 'Aceh',
+    'WIMM': 'Medan',
+    'WIMG': 'Padang',
+    'WIBB': 'Pekanbaru',
+    'WION': 'Ranai',
+    'WIKK': 'Pangkal Pinang',
+    'WIPL': 'Bengkulu',
+    'WIII': 'Jakarta',
+    'WIIL': 'Cilacap',
+    'WRSJ': 'Surabaya',
+    'WRRR': 'Denpasar',
+    'WRLR': 'Tarakan',
+    'WRBB': 'Banjarmasin',
+    'WRLL': 'Balikpapan',
+    'WIOO': 'Pontianak',
+    'WRBI': 'Pangkalan Bun',
+    'WAAA': 'Makassar',
+    'WAML': 'Palu',
+    'WAMM': 'Manado',
+    'WRKC': 'Maumere',
+    'WRKK': 'Kupang',
+    'WAMT': 'Ternate',
+    'WAPP': 'Ambon',
+    'WAPI': 'Saumlaki',
+    'WABB': 'Biak',
+    'WASS': 'Sorong',
+    'WAJJ': 'Jayapura',
+    'WAJW': 'Wamena',
+    'WAKK': 'Merauke'
+})
+STATIONS = tuple(STATION_TO_LOC)
 
 ## Threshold Criteria for Categorization of Atmospheric Stability ##
-def index_criteria(cape_value, k_index_value, lifted_index_value, showalter_index_value):
-    if cape_value > 2500 and k_index_value > 30 and lifted_index_value < -5:
-        kategori = "Labil Kuat"
-    elif cape_value > 1000 and k_index_value > 20 and lifted_index_value < -3:
-        kategori = "Labil Sedang"
-    elif cape_value > 100 and k_index_value > 0 and showalter_index_value < 0:
-        kategori = "Labil Lemah"
-    else:
-        kategori = "Stabil"
-    return kategori
+KATEGORI = np.array(['Stabil', 'Labil Lemah', 'Labil Sedang', 'Labil Kuat']) # indeks = kode dari index_criteria
+KATEGORI_COLORS = np.array(['green', 'yellow', 'orange', 'red']) # warna marker peta, urutan sama dengan KATEGORI
+
+def index_criteria(cape, k_index, lifted_index, showalter_index):
+    # evaluasi tanpa percabangan atas seluruh stasiun sekaligus, hasil berupa kode untuk KATEGORI
+    kuat = (cape > 2500) & (k_index > 30) & (lifted_index < -5)
+    sedang = (cape > 1000) & (k_index > 20) & (lifted_index < -3) & ~kuat
+    lemah = (cape > 100) & (k_index > 0) & (showalter_index < 0) & ~(kuat | sedang)
+    return (3 * kuat + 2 * sedang + lemah).astype(np.int8)
+
+## Thermodynamic Kernels (ndarray tanpa unit: tekanan hPa, suhu K, bentuk (N_stasiun, N_level)) ##
+RD = 287.04749 # J/(kg K), konstanta gas udara kering
+CP = 1004.6662 # J/(kg K), kapasitas panas udara kering
+KAPPA = RD / CP
+EPSILON = 0.6219569 # rasio berat molekul uap air dan udara kering
+LV = 2.50084e6 # J/kg, kalor laten penguapan
+ZERO_C = 273.15
+# grid log-p bersama (hPa); semua sounding diinterpolasi sekali ke grid ini lalu dipakai ulang oleh semua indeks
+LOG_P_LEVELS = np.linspace(np.log(1000.), np.log(100.), 200)
+P_LEVELS = np.exp(LOG_P_LEVELS)
+
+@vectorize(['float64(float64, float64)'], cache=True)
+def saturation_mixing_ratio(p, t):
+    es = 6.112 * np.exp(17.67 * (t - ZERO_C) / (t - 29.65)) # Bolton (1980)
+    return EPSILON * es / (p - es)
+
+@vectorize(['float64(float64, float64)'], cache=True)
+def moist_lapse_rate(p, t):
+    rs = saturation_mixing_ratio(p, t)
+    return (RD * t + LV * rs) / (CP + LV * LV * rs * EPSILON / (RD * t * t)) / p
+
+# integrasi RK4 adiabatik basah dari (p0, t0) ke setiap level p, dikompilasi Numba dan
+# di-broadcast per parsel: moist_lapse(p[N_level], t0[N], p0[N]) -> (N, N_level)
+@guvectorize(['void(float64[:], float64, float64, float64[:])'], '(n),(),()->(n)', nopython=True, cache=True)
+def moist_lapse(p, t0, p0, out):
+    t = t0
+    pc = p0
+    for k in range(p.size):
+        if not p[k] <= p0: # hanya level di atas titik awal parsel
+            out[k] = np.nan
+            continue
+        h = p[k] - pc
+        k1 = moist_lapse_rate(pc, t)
+        k2 = moist_lapse_rate(pc + h / 2, t + h * k1 / 2)
+        k3 = moist_lapse_rate(pc + h / 2, t + h * k2 / 2)
+        k4 = moist_lapse_rate(pc + h, t + h * k3)
+        t = t + h * (k1 + 2 * k2 + 2 * k3 + k4) / 6
+        pc = p[k]
+        out[k] = t
+
+def lcl(p, t, td):
+    t_lcl = 1. / (1. / (td - 56.) + np.log(t / td) / 800.) + 56. # Bolton (1980) eq. 15
+    return p * (t_lcl / t) ** (1. / KAPPA), t_lcl
+
+def parcel_profile(p, p0, t0, td0):
+    p_lcl, t_lcl = lcl(p0, t0, td0)
+    dry = t0[:, None] * (p / p0[:, None]) ** KAPPA
+    moist = moist_lapse(p, t_lcl, p_lcl)
+    profile = np.where(p <= p_lcl[:, None], moist, dry)
+    return np.where(p > p0[:, None], np.nan, profile) # di bawah titik awal parsel tidak terdefinisi
+
+def at_level(p, field, level):
+    # interpolasi log-p antara dua level grid; grid sama untuk semua stasiun, cukup satu pasang indeks
+    j = np.searchsorted(-p, -level)
+    w = np.log(p[j - 1] / level) / np.log(p[j - 1] / p[j])
+    return field[:, j - 1] + w * (field[:, j] - field[:, j - 1])
+
+def virtual_temperature(t, mixing_ratio):
+    return t * (mixing_ratio + EPSILON) / (EPSILON * (1 + mixing_ratio))
 
-def get_magnitude(quantity):
-    return quantity.magnitude
+def cape_surface(p, t, td, profile, p0, td0):
+    # luas antara LFC dan EL dengan koreksi suhu virtual, seperti mpcalc.cape_cin
+    parcel_mixing_ratio = np.minimum(saturation_mixing_ratio(p, profile), saturation_mixing_ratio(p0, td0)[:, None])
+    buoyancy = virtual_temperature(profile, parcel_mixing_ratio) - virtual_temperature(t, saturation_mixing_ratio(p, td))
+    positive = buoyancy > 0
+    lower, upper = buoyancy[:, :-1], buoyancy[:, 1:]
+    dx = -np.diff(np.log(p))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        layer = 0.5 * (lower + upper) * dx
+        crossing = 0.5 * np.where(lower > 0, lower, upper) ** 2 / np.abs(upper - lower) * dx # bagian positif lapisan yang memotong nol
+    lfc = np.argmax(positive, axis=1)[:, None]
+    el = positive.shape[1] - 1 - np.argmax(positive[:, ::-1], axis=1)[:, None]
+    k = np.arange(dx.size)
+    inside = (k >= lfc) & (k < el)
+    edge = ((k == lfc - 1) | (k == el)) & ((lower > 0) != (upper > 0))
+    cape = RD * (np.where(inside, np.nan_to_num(layer), 0.) + np.where(edge, np.nan_to_num(crossing), 0.)).sum(axis=1)
+    return np.where(positive.any(axis=1), np.maximum(cape, 0.), 0.)
 
-def retrieve_data_from_wyoming(date, stations):
+def k_index(p, t, td):
+    t850, t700, t500 = (at_level(p, t, level) for level in (850, 700, 500))
+    td850, td700 = (at_level(p, td, level) for level in (850, 700))
+    return (t850 - t500) + (td850 - ZERO_C) - (t700 - td700)
+
+def lifted_index(p, t, profile):
+    return at_level(p, t, 500) - at_level(p, profile, 500)
+
+def showalter_index(p, t, td):
+    p_layer = np.concatenate([[850.], p[(p < 850) & (p > 500)], [500.]])
+    p0 = np.full(t.shape[0], 850.)
+    profile = parcel_profile(p_layer, p0, at_level(p, t, 850), at_level(p, td, 850))
+    return at_level(p, t, 500) - profile[:, -1]
+
+def stack_profiles(data_per_station):
+    from metpy.units import pandas_dataframe_to_unit_arrays
+    # interpolasi tiap sounding ke P_LEVELS agar semua stasiun dihitung sekaligus
+    n = len(data_per_station)
+    temperature = np.full((n, P_LEVELS.size), np.nan)
+    dewpoint = np.full((n, P_LEVELS.size), np.nan)
+    surface = np.full((n, 3), np.nan) # tekanan, suhu, titik embun level terbawah
+    stations, skipped = [], []
+    for key, value in data_per_station.items():
+        da = pandas_dataframe_to_unit_arrays(value, column_units=value.attrs['units'])
+        # konversi unit sekali di sini, kernel di bawah hanya menerima float (hPa, K)
+        p = da['pressure'].to('hPa').magnitude
+        t = da['temperature'].to('K').magnitude
+        td = da['dewpoint'].to('K').magnitude
+        valid = np.isfinite(p) & np.isfinite(t) & np.isfinite(td)
+        p, t, td = p[valid], t[valid], td[valid]
+        # sounding tanpa level 850 atau 500 hPa tidak bisa dipakai untuk indeks, lewati sebelum perhitungan parsel
+        if p.size < 10 or p.min() > 500 or p.max() < 850:
+            skipped.append(key)
+            continue
+        i = len(stations)
+        stations.append(key)
+        surface[i] = p[0], t[0], td[0]
+        # interpolasi linear terhadap log p; np.interp butuh sumbu naik, di luar rentang sounding diisi NaN
+        log_p = np.log(p[::-1])
+        temperature[i] = np.interp(LOG_P_LEVELS, log_p, t[::-1], left=np.nan, right=np.nan)
+        dewpoint[i] = np.interp(LOG_P_LEVELS, log_p, td[::-1], left=np.nan, right=np.nan)
+    n = len(stations)
+    return stations, skipped, surface[:n, 0], surface[:n, 1], surface[:n, 2], temperature[:n], dewpoint[:n]
+
+CACHE_DIR = Path('cache') # cache sounding di disk agar tetap ada setelah restart
+
+@st.cache_data(ttl=timedelta(hours=6), show_spinner=False)
+def _fetch_one(date, station):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    path = CACHE_DIR / f'{date:%Y%m%d%H}_{station}.parquet'
+    if path.exists():
+        table = pq.read_table(path)
+        df = table.to_pandas()
+        df.attrs['units'] = json.loads(table.schema.metadata[b'units'])
+        return df
+    from siphon.simplewebservice.wyoming import WyomingUpperAir
+    df = WyomingUpperAir.request_data(date, station)
+    # atribut units dari siphon hilang saat di-pickle oleh cache, simpan di attrs
+    df.attrs['units'] = df.units
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**table.schema.metadata, b'units': json.dumps(df.units).encode()})
+    CACHE_DIR.mkdir(exist_ok=True)
+    tmp = path.with_suffix('.tmp') # tulis ke file sementara agar tidak ada parquet setengah jadi
+    pq.write_table(table, tmp, compression='zstd')
+    tmp.replace(path)
+    return df
+
+def _is_transient(error):
+    # siphon membungkus HTTPError dari server Wyoming menjadi `ValueError from e`;
+    # ValueError tanpa penyebab HTTPError berarti memang tidak ada data
+    if isinstance(error, ValueError):
+        error = error.__cause__
+    return isinstance(error, (requests.exceptions.HTTPError, requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+async def retrieve_data_from_wyoming_async(date, stations: tuple[str, ...], max_workers=16, retries=5):
+    loop = asyncio.get_running_loop()
+    # siphon bersifat blocking, jalankan di thread pool sendiri; default executor asyncio
+    # hanya min(32, cpu + 4) thread sehingga di server kecil request tetap antre
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        async def fetch(station):
+            for attempt in range(retries):
+                try:
+                    return await loop.run_in_executor(executor, _fetch_one, date, station)
+                except (ValueError, requests.exceptions.RequestException) as e:
+                    # server Wyoming atau koneksi biasanya hanya bermasalah sesaat, coba lagi dengan exponential backoff
+                    if not _is_transient(e) or attempt == retries - 1:
+                        raise
+                    await asyncio.sleep(2 ** attempt + random.random())
+        results = await asyncio.gather(*[fetch(station) for station in stations], return_exceptions=True)
     data_per_station = {}
-    for station in stations:
-        try: # error handling
-            dfori = WyomingUpperAir.request_data(date, station)
-            data_per_station[station] = dfori
-        except requests.exceptions.HTTPError as e:
-            st.write(f'Oops, it looks like the server is busy. Hold on. Retrying to retrieve data ...')
-        except ValueError:
+    for station, result in zip(stations, results):
+        if isinstance(result, Exception) and _is_transient(result): # error handling
+            st.write(f'Oops, it looks like the server is busy. Gave up retrieving data for station {station} after {retries} attempts')
+        elif isinstance(result, ValueError):
             st.write(f'No data available for {date}, for station {station}')
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            data_per_station[station] = result
     return data_per_station
 
-def calculate_stability(data_per_station, station_to_location):
-    dfstationdata = pd.concat(data_per_station.values()).drop_duplicates(['station'])
-    dfindex = pd.DataFrame(columns=['Waktu','Lintang','Bujur','CAPE', 'K-Index', 'Lifted Index', 'Showalter Index'], index=station_to_location.items())
-    for key, value in data_per_station.items(): # loop thorugh dict
-        df_units = value.units
-        da = pandas_dataframe_to_unit_arrays(value, column_units=df_units)
-        profile = mpcalc.parcel_profile(da['pressure'], da['temperature'][0], da['dewpoint'][0])
-        time = dfstationdata[dfstationdata['station'] == key]['time'].values[0]
-        lat = dfstationdata[dfstationdata['station'] == key]['latitude'].values[0]
-        lon = dfstationdata[dfstationdata['station'] == key]['longitude'].values[0]
-        cape, cin = mpcalc.cape_cin(da['pressure'], da['temperature'], da['dewpoint'], profile)
-        cape = round(cape.magnitude, 0)
-        kindex = mpcalc.k_index(da['pressure'], da['temperature'], da['dewpoint'])
-        kindex = round(kindex.magnitude, 0)
-        lift_index = mpcalc.lifted_index(da['pressure'], da['temperature'], profile)
-        lift_index = np.round(lift_index.magnitude, 1)
-        showalter = mpcalc.showalter_index(da['pressure'], da['temperature'], da['dewpoint'])
-        showalter = np.round(showalter.magnitude, 1)
-        # assign to new dataframe
-        dfindex.loc[key] = [time, lat, lon, cape, kindex, lift_index, showalter]
-    dfindexnew = dfindex.copy()
-    for i in dfindex.columns: # loop sebanyak kolom dfindex
-        try: # error handling untuk mencegah error akibat kolom tdk ada unitnya
-            dfindexnew[i] = dfindex[i].apply(get_magnitude)
-        except AttributeError:
-            pass
-    dfindexnew['Kategori'] = np.nan
-    dfindexnew['Kategori'] = dfindexnew.apply(lambda row: index_criteria(row['CAPE'], row['K-Index'], row['Lifted Index'], row['Showalter Index']), axis=1)
-    dfindexnew = dfindexnew.dropna(subset=['Lintang', 'Bujur'])    
-    return dfindexnew
+@st.cache_data(ttl=timedelta(hours=6))
+def calculate_stability(data_per_station):
+    # stasiun dengan sounding terlalu dangkal tidak ikut dihitung, dikembalikan agar dilaporkan sebagai tanpa data
+    stations, skipped, p0, t0, td0, temperature, dewpoint = stack_profiles(data_per_station)
+    profile = parcel_profile(P_LEVELS, p0, t0, td0)
+    cape = np.round(cape_surface(P_LEVELS, temperature, dewpoint, profile, p0, td0), 0)
+    kindex = np.round(k_index(P_LEVELS, temperature, dewpoint), 0)
+    lift_index = np.round(lifted_index(P_LEVELS, temperature, profile), 1)
+    showalter = np.round(showalter_index(P_LEVELS, temperature, dewpoint), 1)
+    kategori = KATEGORI[index_criteria(cape, kindex, lift_index, showalter)]
+    # level 850/500 hPa di-interpolasi dari tetangga grid, jadi sounding yang lolos cek di stack_profiles
+    # tapi tepat di batas grid masih bisa menghasilkan NaN; jangan sampai NaN terklasifikasi "Stabil"
+    complete = np.isfinite(cape) & np.isfinite(kindex) & np.isfinite(lift_index) & np.isfinite(showalter)
+    index, rows = [], []
+    for i, key in enumerate(stations):
+        if not complete[i]:
+            skipped.append(key)
+            continue
+        # metadata stasiun sama di setiap baris sounding, cukup ambil baris pertama
+        time, lat, lon = (data_per_station[key][column].values[0] for column in ['time', 'latitude', 'longitude'])
+        if not (np.isfinite(lat) and np.isfinite(lon)): # stasiun tanpa koordinat tidak bisa dipetakan
+            continue
+        index.append((key, STATION_TO_LOC[key]))
+        rows.append((time, lat, lon, cape[i], kindex[i], lift_index[i], showalter[i], kategori[i]))
+    # bangun dataframe sekali di akhir, bukan .loc per baris
+    dfindex = pd.DataFrame(rows, index=pd.MultiIndex.from_tuples(index, names=[None, None]),
+                           columns=['Waktu','Lintang','Bujur','CAPE', 'K-Index', 'Lifted Index', 'Showalter Index', 'Kategori'])
+    return dfindex, skipped
 
 def add_legend(map):
+    import folium
     legend_html = """
     <div style="position: fixed; bottom: 50px; left: 50px; background-color: rgba(255, 255, 255, 0.8); border-radius: 5px; z-index: 1000; padding: 10px; font-size: 12px;">
         <div style="background-color: green; width: 10px; height: 10px; display: inline-block;"></div> Stabil<br>
@@ -84,35 +288,34 @@ def add_legend(map):
     """
     map.get_root().html.add_child(folium.Element(legend_html))
 
+@st.cache_resource
 def mapplot(df):
-    df = df.dropna(subset=['Lintang', 'Bujur'])
+    import folium
     # Create a base map
     m = folium.Map(location=[df['Lintang'].mean(), df['Bujur'].mean()], zoom_start=5)
-    # Add points to the map
-    for _, row in df.iterrows():
-        if row['Kategori'] == 'Stabil':
-            color = 'green'
-        elif row['Kategori'] == 'Labil Lemah':
-            color = 'yellow'
-        elif row['Kategori'] == 'Labil Sedang':
-            color = 'orange'
-        elif row['Kategori'] == 'Labil Kuat':
-            color = 'red'
-        # Create a circle marker with a popup for location and category
-        circle_marker = folium.CircleMarker(
-            location=[row['Lintang'], row['Bujur']],
-            radius=10,
-            color=color,
-            fill=True,
-            fill_color=color
-        )
-
+    # Add points to the map as a single GeoJSON layer
+    codes = pd.Categorical(df['Kategori'], categories=KATEGORI).codes
+    # kode -1 = label di luar KATEGORI; beri abu-abu, jangan sampai terbaca sebagai Labil Kuat
+    colors = np.where(codes >= 0, KATEGORI_COLORS[codes], 'gray')
+    columns = df[['Lintang', 'Bujur', 'Kategori', 'CAPE', 'K-Index', 'Lifted Index', 'Showalter Index']]
+    columns = columns.assign(color=colors, name=df.index.map(lambda x: x[-1]))
+    features = [
+        {
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+            'properties': {'name': name, 'Kategori': kategori, 'CAPE': cape, 'K-Index': ki,
+                           'Lifted Index': li, 'Showalter Index': si, 'color': color},
+        }
+        for lat, lon, kategori, cape, ki, li, si, color, name in columns.itertuples(index=False, name=None)
+    ]
+    folium.GeoJson(
+        {'type': 'FeatureCollection', 'features': features},
+        marker=folium.CircleMarker(radius=10, fill=True),
+        style_function=lambda feature: {'color': feature['properties']['color'], 'fillColor': feature['properties']['color']},
         # Add a popup for category information (on click)
-        category_popup = folium.Popup(f"{row.name[-1]}\n\n: {row['Kategori']}\n\nCAPE: {row['CAPE']}\n\nKI: {row['K-Index']}\n\nLI: {row['Lifted Index']}\n\nSI: {row['Showalter Index']}", parse_html=True)
-        circle_marker.add_child(category_popup)
-        
-        # Add the circle marker to the map
-        circle_marker.add_to(m)
+        popup=folium.GeoJsonPopup(fields=['name', 'Kategori', 'CAPE', 'K-Index', 'Lifted Index', 'Showalter Index'],
+                                  aliases=['Lokasi', 'Kategori', 'CAPE', 'KI', 'LI', 'SI']),
+    ).add_to(m)
 
     # Add legend to the map
     add_legend(m)
@@ -130,50 +333,16 @@ def main():
         next_data_time_utc = last_data_time_utc + timedelta(hours=12)
     else:
         next_data_time_utc = last_data_time_utc
-    date = datetime(2023, 10, 16, 00)
-
-    # comment ini untuk percobaan biar ga lama runningnya kalo error
-    stations = ['WITT','WIMM','WIMG','WIBB','WION','WIKK','WIPL','WIII','WIIL','WRSJ','WRRR','WRLR','WRBB','WRLL','WIOO',
-                'WRBI','WAAA','WAML','WAMM','WRKC','WRKK','WAMT','WAPP','WAPI','WABB','WASS','WAJJ','WAJW','WAKK']
-    station_to_location = {
-        'WITT': 'Aceh',
-        'WIMM': 'Medan',
-        'WIMG': 'Padang',
-        'WIBB': 'Pekanbaru',
-        'WION': 'Ranai',
-        'WIKK': 'Pangkal Pinang',
-        'WIPL': 'Bengkulu',
-        'WIII': 'Jakarta',
-        'WIIL': 'Cilacap',
-        'WRSJ': 'Surabaya',
-        'WRRR': 'Denpasar',
-        'WRLR': 'Tarakan',
-        'WRBB': 'Banjarmasin',
-        'WRLL': 'Balikpapan',
-        'WIOO': 'Pontianak',
-        'WRBI': 'Pangkalan Bun',
-        'WAAA': 'Makassar',
-        'WAML': 'Palu',
-        'WAMM': 'Manado',
-        'WRKC': 'Maumere',
-        'WRKK': 'Kupang',
-        'WAMT': 'Ternate',
-        'WAPP': 'Ambon',
-        'WAPI': 'Saumlaki',
-        'WABB': 'Biak',
-        'WASS': 'Sorong',
-        'WAJJ': 'Jayapura',
-        'WAJW': 'Wamena',
-        'WAKK': 'Merauke'
-        }
 
     on = st.checkbox('Start Data Processing')
     if on:
         st.write('Retrieving Latest Data from Wyoming ...')
-        data_per_station = retrieve_data_from_wyoming(date, stations)
+        data_per_station = asyncio.run(retrieve_data_from_wyoming_async(DATE, STATIONS))
         st.write('Finish retrieving data from Wyoming')
         st.write('Calculating Atmospheric Stability Index')
-        df = calculate_stability(data_per_station, station_to_location)
+        df, skipped = calculate_stability(data_per_station)
+        for station in skipped:
+            st.write(f'No data available for {DATE}, for station {station}')
         st.write('Displaying Calculated Atmospheric Stability Index')
         st.dataframe(df)
 
@@ -0,0 +1,82 @@
+# Cek paritas kernel termodinamika ASDAS terhadap MetPy pada sounding sintetis tetap.
+# Jalankan dengan: python -m pytest -q tests
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+import metpy.calc as mpcalc
+from metpy.units import pandas_dataframe_to_unit_arrays
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import ASDAS
+
+UNITS = {'pressure': 'hPa', 'height': 'meter', 'temperature': 'degC', 'dewpoint': 'degC',
+         'direction': 'degrees', 'speed': 'knot', 'u_wind': 'knot', 'v_wind': 'knot',
+         'station': None, 'station_number': None, 'time': None, 'latitude': 'degrees',
+         'longitude': 'degrees', 'elevation': 'meter', 'pw': 'millimeter'}
+
+# (stasiun, tekanan permukaan hPa, suhu permukaan degC, depresi titik embun degC)
+SOUNDINGS = [
+    ('WIII', 1008, 31, 3),
+    ('WAAA', 1005, 28, 8),
+    ('WITT', 1010, 26, 15),
+    ('WRSJ', 1009, 33, 2),
+    ('WAMM', 1006, 30, 5),
+    ('WIMM', 1004, 27, 1),
+]
+
+
+def sounding(station, psfc, tsfc, depression, ptop=100.):
+    p = np.unique(np.concatenate([[psfc, ptop], np.arange(1000., 90., -25.)]))[::-1]
+    p = p[(p <= psfc) & (p >= ptop)]
+    z = 7000 * np.log(psfc / p)
+    t = np.where(z < 16000, tsfc - 6.0e-3 * z, tsfc - 96) + 1.5 * np.sin(z / 900)
+    td = t - depression - 4e-4 * z
+    df = pd.DataFrame({'pressure': p, 'height': z, 'temperature': t, 'dewpoint': td,
+                       'direction': 0., 'speed': 0., 'u_wind': 0., 'v_wind': 0.,
+                       'station': station, 'station_number': 0, 'time': pd.Timestamp('2023-10-16'),
+                       'latitude': 0., 'longitude': 120., 'elevation': 0., 'pw': 40.})
+    df.attrs['units'] = UNITS
+    return df
+
+
+def metpy_indices(df):
+    da = pandas_dataframe_to_unit_arrays(df, column_units=UNITS)
+    p, t, td = da['pressure'], da['temperature'], da['dewpoint']
+    profile = mpcalc.parcel_profile(p, t[0], td[0])
+    cape, _ = mpcalc.cape_cin(p, t, td, profile)
+    return (cape.m, mpcalc.k_index(p, t, td).m, mpcalc.lifted_index(p, t, profile).m[0],
+            mpcalc.showalter_index(p, t, td).m[0])
+
+
+@pytest.fixture(scope='module')
+def stability():
+    data = {station: sounding(station, *args) for station, *args in SOUNDINGS}
+    dfindex, skipped = ASDAS.calculate_stability.__wrapped__(data)
+    assert skipped == []
+    return data, dfindex.droplevel(1)
+
+
+@pytest.mark.parametrize('station', [s[0] for s in SOUNDINGS])
+def test_indices_match_metpy(stability, station):
+    data, dfindex = stability
+    cape, kindex, lift_index, showalter = metpy_indices(data[station])
+    row = dfindex.loc[station]
+    assert row['CAPE'] == pytest.approx(cape, rel=0.03, abs=50)
+    assert row['K-Index'] == pytest.approx(kindex, abs=1)
+    assert row['Lifted Index'] == pytest.approx(lift_index, abs=0.2)
+    assert row['Showalter Index'] == pytest.approx(showalter, abs=0.2)
+
+
+@pytest.mark.parametrize('station, args', [
+    ('WAJW', (850.0, 22, 4)),          # permukaan tepat di 850 hPa, di antara dua level grid
+    ('WAKK', (1005, 30, 3, 500.0)),    # sounding berakhir tepat di 500 hPa
+])
+def test_grid_boundary_soundings_are_skipped(station, args):
+    data = {'WIII': sounding('WIII', *SOUNDINGS[0][1:]), station: sounding(station, *args)}
+    dfindex, skipped = ASDAS.calculate_stability.__wrapped__(data)
+    assert skipped == [station]
+    assert dfindex.index.get_level_values(0).tolist() == ['WIII']
+    assert dfindex[['CAPE', 'K-Index', 'Lifted Index', 'Showalter Index']].notna().all(axis=None)
@@ -0,0 +1,72 @@
+# Cek retry retrieve_data_from_wyoming_async dengan WyomingUpperAir.get_path yang di-mock.
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+import requests
+from siphon.simplewebservice.wyoming import WyomingUpperAir
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+import ASDAS
+
+CSV = ('time,longitude,latitude,pressure_hPa,geopotential height_m,temperature_C,'
+       'dew point temperature_C,wind direction_degree,wind speed_m/s\n'
+       '2023-10-16 00:00:00,106.65,-6.12,1008,8,31.0,28.0,90,2\n'
+       '2023-10-16 00:00:00,106.65,-6.12,850,1500,21.0,18.0,90,5\n')
+
+
+@pytest.fixture(autouse=True)
+def isolated(tmp_path, monkeypatch):
+    # tanpa cache disk/memori dan tanpa menunggu backoff
+    monkeypatch.setattr(ASDAS, 'CACHE_DIR', tmp_path)
+    ASDAS._fetch_one.clear()
+    with mock.patch.object(ASDAS.asyncio, 'sleep', mock.AsyncMock()):
+        yield
+
+
+def get_path_failing(failures, error):
+    calls = []
+    def get_path(self, path):
+        calls.append(path)
+        if len(calls) <= failures:
+            raise error
+        return SimpleNamespace(text=CSV)
+    return get_path, calls
+
+
+def retrieve(get_path, stations=('WIII',), retries=5):
+    with mock.patch.object(WyomingUpperAir, 'get_path', get_path):
+        return asyncio.run(ASDAS.retrieve_data_from_wyoming_async(datetime(2023, 10, 16), stations, retries=retries))
+
+
+@pytest.mark.parametrize('error', [requests.HTTPError('Server Error (503: busy)'),
+                                   requests.ConnectionError('DNS failure'),
+                                   requests.Timeout('timed out')])
+def test_transient_errors_are_retried_until_success(error):
+    get_path, calls = get_path_failing(2, error)
+    data = retrieve(get_path)
+    assert len(calls) == 3
+    assert list(data) == ['WIII']
+    assert data['WIII']['pressure'].tolist() == [1008, 850]
+
+
+def test_gives_up_after_retries():
+    get_path, calls = get_path_failing(10, requests.HTTPError('Server Error (503: busy)'))
+    with mock.patch.object(ASDAS.st, 'write') as write:
+        data = retrieve(get_path, retries=4)
+    assert len(calls) == 4
+    assert data == {}
+    assert 'server is busy' in write.call_args.args[0]
+
+
+def test_missing_data_is_not_retried():
+    get_path, calls = get_path_failing(10, ValueError('no data'))
+    with mock.patch.object(ASDAS.st, 'write') as write:
+        data = retrieve(get_path)
+    assert len(calls) == 1
+    assert data == {}
+    assert 'No data available' in write.call_args.args[0]